@@ -44,12 +44,12 @@ class QuadraticDomain():
             bounds (ndarray): (3,2) Bounds for (x,y,theta)
         '''
 
-        v = mg.closest_point2surf(p, mesh.coords)
+        v = mesh.closest_point(np.ravel(p))
         C, R, iR = self._construct_local_quadric(mesh, v)
 
         # Calculate neighbours, rotate to flatten on XY plane
-        neighbours_ind = np.where(
-            nplalg.norm(mesh.coords - v, axis=1) < self.span)
+        neighbours_ind = np.asarray(
+            mesh.kdtree.query_ball_point(v, self.span), dtype=np.intp)
         neighbours = mesh.coords[neighbours_ind]
         r_neighbours = geometry.affine(R, neighbours)
         minarr = np.min(r_neighbours, axis=0)
@@ -72,17 +72,14 @@ class QuadraticDomain():
         '''
 
         # Get local neighbourhood
-        neighbours_ind = np.where(
-            nplalg.norm(mesh.coords - p, axis=1) < self.local_span)
+        neighbours_ind = np.asarray(
+            mesh.kdtree.query_ball_point(p, self.local_span), dtype=np.intp)
 
         neighbours = mesh.coords[neighbours_ind]
 
-        # Calculate normals
-        normals = mg.get_normals(mesh.nodes[neighbours_ind], mesh.nodes,
-                                 mesh.coords, mesh.trigs)
-
-        # Usage average of normals for alignment
-        n = normals / nplalg.norm(normals)
+        # Use average of normals for alignment
+        n = mg.get_normals(mesh.nodes[neighbours_ind], mesh.nodes,
+                           mesh.coords, mesh.trigs)
 
         # Make transformation matrix
         z = np.array([0, 0, 1])
@@ -108,20 +105,46 @@ class QuadraticDomain():
         return C, affine, i_affine
 
     def _get_sample(self, mesh, x, y):
-        pp = geometry.quadratic_surf_position(x, y, self.C)[np.newaxis, :]
+        pp = geometry.quadratic_surf_position(x, y, self.C)
         p = geometry.affine(self.iR, pp)
-        v = mg.closest_point2surf(p, mesh.coords)
+        v = mesh.closest_point(p)
+        return self._construct_sample(mesh, v)
+
+    def _construct_sample(self, mesh, v):
+        '''
+        Given a head surface vertex, estimate local geometry to
+        get accurate normals/curvatures
+
+        Arguments:
+            mesh: `fieldopt.geometry.mesh_wrapper.HeadModel` object
+            v (ndarray): (3,) head surface vertex coordinates
+
+        Returns:
+            sample (ndarray): (3,) coil centre
+            iR (ndarray): (4,4) Affine from local quadric to mesh space
+            frame (tuple): Local quadric frame
+                (see `fieldopt.geometry.geometry.quadratic_surf_frame`)
+        '''
         C, _, iR = self._construct_local_quadric(mesh, v)
-        _, _, n = geometry.compute_principal_dir(0, 0, C)
+        frame = geometry.quadratic_surf_frame(0, 0, C)
 
         # Map normal to coordinate space
-        n_r = iR[:3, :3] @ n
+        n_r = iR[:3, :3] @ frame[3]
         n_r = n_r / nplalg.norm(n_r)
 
         # Push sample out by set distance
         sample = v + (n_r * self.distance)
 
-        return sample, iR, C, n
+        return sample, iR, frame
+
+    def _orient_coil(self, sample, iR, frame, theta, flip_norm):
+        R, v1, v2, preaff_norm = frame
+        preaff_rot = geometry.quadratic_surf_orientation(R, v1, v2, theta)
+        rot = iR[:3, :3] @ preaff_rot
+        n = iR[:3, :3] @ preaff_norm
+
+        normflip = -1 if flip_norm else 1
+        return geometry.define_coil_orientation(sample, rot, normflip * n)
 
     def place_coil(self, mesh, x, y, theta, flip_norm=True):
         '''
@@ -138,11 +161,37 @@ class QuadraticDomain():
         Returns:
             matsimnibs (ndarray): A matsimnibs orientation matrix
         '''
-        sample, R, C, _ = self._get_sample(mesh, x, y)
-        preaff_rot, preaff_norm = geometry.quadratic_surf_rotation(
-            0, 0, theta, C)
-        rot = R[:3, :3] @ preaff_rot
-        n = R[:3, :3] @ preaff_norm
+        sample, iR, frame = self._get_sample(mesh, x, y)
+        return self._orient_coil(sample, iR, frame, theta, flip_norm)
 
-        normflip = -1 if flip_norm else 1
-        return geometry.define_coil_orientation(sample, rot, normflip * n)
+    def place_coils(self, mesh, inputs, flip_norm=True):
+        '''
+        Place multiple coils on mesh surface.
+
+        Projection of all inputs onto the head surface is performed
+        in a single batch, local geometry is then estimated once per
+        unique :math:`(x,y)` position and shared across orientations
+
+        Arguments:
+            mesh: `fieldopt.geometry.mesh_wrapper.HeadModel` object
+            inputs (ndarray): (N,3) array of (x, y, theta) entries
+            flip_norm (bool): Whether the normal should be flipped
+                when constructing the orientation matrix
+
+        Returns:
+            List of N matsimnibs orientation matrices
+        '''
+        inputs = np.asarray(inputs, dtype=np.float64)
+        xy, pos_ind = np.unique(inputs[:, :2], axis=0, return_inverse=True)
+        x, y = xy.T
+
+        pp = np.c_[x, y, geometry.quadratic_surf(x, y, self.C)]
+        p = geometry.affine(self.iR, pp)
+        samples = [
+            self._construct_sample(mesh, v) for v in mesh.closest_point(p)
+        ]
+
+        return [
+            self._orient_coil(*samples[i], t, flip_norm)
+            for i, t in zip(pos_ind.ravel(), inputs[:, 2])
+        ]
@@ -6,9 +6,12 @@
 
 
 import numpy as np
-from scipy.linalg import lstsq
 import numba
 
+# Condition number of the quadratic fit normal equations above which
+# the fit falls back to a least squares solve of the design matrix
+_QUAD_FIT_MAX_COND = 1e12
+
 
 def skew(vector):
     """
@@ -29,14 +32,8 @@ def skew(vector):
     References:
         https://stackoverflow.com/questions/36915774/form-numpy-array-from-possible-numpy-array
     """
-    if isinstance(vector, np.ndarray):
-        return np.array([[0, -vector.item(2),
-                          vector.item(1)],
-                         [vector.item(2), 0, -vector.item(0)],
-                         [-vector.item(1), vector.item(0), 0]])
-
-    return np.array([[0, -vector[2], vector[1]], [vector[2], 0, -vector[0]],
-                     [-vector[1], vector[0], 0]])
+    v = np.ravel(vector)
+    return np.array([[0, -v[2], v[1]], [v[2], 0, -v[0]], [-v[1], v[0], 0]])
 
 
 def affine(A, x):
@@ -45,41 +42,87 @@ def affine(A, x):
 
     Arguments:
         A (ndarray): (4,4) Affine matrix
-        x (ndarray): (3,N) Set of 3D coordinate vectors
+        x (ndarray): (N,3) Set of 3D coordinate vectors
 
     Returns:
         b (ndarray): Transformed coordinates :math: `Ax`
     '''
 
-    h = np.c_[x, np.ones((x.shape[0], 1))]
-    Ah = A @ h.T
-    return Ah.T[:, :3]
+    return x @ A[:3, :3].T + A[:3, 3]
 
 
+@numba.njit(cache=True)
 def rotate_vec2vec(v1, v2):
     '''
     Rotate vector v1 onto v2 and return the transformation matrix R that
     achieves this
 
     Compute transformation matrix :math:`R` that rotates a vector
-    :math:`v1` onto :math:`v2`
+    :math:`v1` onto :math:`v2` using Rodrigues' formula:
+
+    :math:`R = I + K + K^2 / (1 + v1 \\cdot v2)`
+
+    Where :math:`K` is the skew symmetric cross product matrix of
+    :math:`v1 \\times v2`
 
     Arguments:
-        v1 (ndarray): (3,) starting vector
-        v2 (ndarray): (3,) final vector to rotate to
+        v1 (ndarray): (3,) starting unit vector
+        v2 (ndarray): (3,) final unit vector to rotate to
 
     Returns:
         R (ndarray): (3,3) rotation matrix
+
+    Note:
+        If :math:`v1` and :math:`v2` are antiparallel the rotation is
+        not unique, a half-turn about an axis orthogonal to :math:`v1`
+        is returned
     '''
 
-    n = np.cross(v1, v2)
-    sinv = np.linalg.norm(n)
-    cosv = np.dot(v1, v2)
-    R = (np.eye(3) + skew(n) + np.matmul(skew(n), skew(n)) * (1 - cosv) /
-         (sinv**2))
+    cosv = v1[0] * v2[0] + v1[1] * v2[1] + v1[2] * v2[2]
+    if 1.0 + cosv < 1e-12:
+        return _half_turn_orthogonal_to(v1)
+
+    n0 = v1[1] * v2[2] - v1[2] * v2[1]
+    n1 = v1[2] * v2[0] - v1[0] * v2[2]
+    n2 = v1[0] * v2[1] - v1[1] * v2[0]
+    k = 1.0 / (1.0 + cosv)
+
+    # K^2 = nn^T - |n|^2 I
+    d = 1.0 - k * (n0 * n0 + n1 * n1 + n2 * n2)
+
+    R = np.empty((3, 3), dtype=np.float64)
+    R[0, 0] = d + k * n0 * n0
+    R[0, 1] = -n2 + k * n0 * n1
+    R[0, 2] = n1 + k * n0 * n2
+    R[1, 0] = n2 + k * n1 * n0
+    R[1, 1] = d + k * n1 * n1
+    R[1, 2] = -n0 + k * n1 * n2
+    R[2, 0] = -n1 + k * n2 * n0
+    R[2, 1] = n0 + k * n2 * n1
+    R[2, 2] = d + k * n2 * n2
     return R
 
 
+@numba.njit(cache=True)
+def _half_turn_orthogonal_to(v):
+    '''
+    Rotation by :math:`\\pi` about an axis orthogonal to :math:`v`
+
+    Arguments:
+        v (ndarray): (3,) unit vector
+
+    Returns:
+        R (ndarray): (3,3) rotation matrix mapping :math:`v \\to -v`
+    '''
+
+    # Cross with the coordinate axis least aligned with v
+    e = np.zeros(3, dtype=np.float64)
+    e[np.argmin(np.abs(v))] = 1.0
+    a = np.cross(v.astype(np.float64), e)
+    a /= np.linalg.norm(a)
+    return 2.0 * np.outer(a, a) - np.eye(3)
+
+
 def quad_fit(X, b):
     '''
     Perform quadratic surface fitting of form:
@@ -91,16 +134,70 @@ def quad_fit(X, b):
     Arguments:
         X (ndarray): (P, 2) P set of :math:`(x,y)` points
         b (ndarray): (P,) set of :math:`f(x,y)` points
+
+    Returns:
+        C (ndarray): (6,) surface coefficients
+
+    Note:
+        If the points do not determine a unique quadratic surface
+        (e.g. fewer than 6 points or collinear points), the minimum-norm
+        least squares solution is returned
     '''
 
-    # Formulate the linear problem
-    A = np.c_[np.ones((X.shape[0], 1)), X[:, :2],
-              np.prod(X[:, :2], axis=1), X[:, :2]**2]
+    x, y = X[:, 0], X[:, 1]
+    AtA, Atb = _quad_fit_normal_equations(x, y, b)
+    if np.linalg.cond(AtA) < _QUAD_FIT_MAX_COND:
+        return np.linalg.solve(AtA, Atb)
 
-    C, _, _, _ = lstsq(A, b)
+    A = np.c_[np.ones_like(x), x, y, x * y, x * x, y * y]
+    C, _, _, _ = np.linalg.lstsq(A, b, rcond=None)
     return C
 
 
+@numba.njit(cache=True)
+def _quad_fit_normal_equations(x, y, b):
+    '''
+    Form the normal equations :math:`A^TAx = A^Tb` of the quadratic surface
+    least squares problem. :math:`A^TA` and :math:`A^Tb` are
+    accumulated row by row so that the (P,6) design matrix is
+    never formed
+
+    Arguments:
+        x (ndarray): (P,) :math:`x` coordinates
+        y (ndarray): (P,) :math:`y` coordinates
+        b (ndarray): (P,) set of :math:`f(x,y)` points
+
+    Returns:
+        AtA (ndarray): (6,6) :math:`A^TA`
+        Atb (ndarray): (6,) :math:`A^Tb`
+    '''
+
+    AtA = np.zeros((6, 6), dtype=np.float64)
+    Atb = np.zeros(6, dtype=np.float64)
+    a = np.empty(6, dtype=np.float64)
+
+    for i in range(x.shape[0]):
+        a[0] = 1.0
+        a[1] = x[i]
+        a[2] = y[i]
+        a[3] = x[i] * y[i]
+        a[4] = x[i] * x[i]
+        a[5] = y[i] * y[i]
+
+        for j in range(6):
+            Atb[j] += a[j] * b[i]
+            for k in range(j, 6):
+                AtA[j, k] += a[j] * a[k]
+
+    # Fill in lower triangle of symmetric matrix
+    for j in range(6):
+        for k in range(j):
+            AtA[j, k] = AtA[k, j]
+
+    return AtA, Atb
+
+
+@numba.njit(cache=True)
 def compute_principal_dir(x, y, C):
     '''
     Compute the principal direction of a quadratic surface :math:`S` of form:
@@ -115,34 +212,54 @@ def compute_principal_dir(x, y, C):
         C (ndarray): (6,) surface coefficients
 
     Returns:
-        V (ndarray): (2,2) Principal component column vectors
+        v1 (ndarray): (3,) First principal direction
+        v2 (ndarray): (3,) Second principal direction, `v1` rotated
+            by 90 degrees about the :math:`z` axis
         n (ndarray): (3,) normal to surface S at point (x,y)
-    '''
 
-    # Compute partial first and second derivatives
-    r_x = np.array([1, 0, 2 * C[4] * x + C[1] + C[3] * y])
-    r_y = np.array([0, 1, 2 * C[5] * y + C[2] + C[3] * x])
-    r_xx = np.array([0, 0, 2 * C[4]])
-    r_yy = np.array([0, 0, 2 * C[5]])
-    r_xy = np.array([0, 0, C[3]])
+    Note:
+        The first derivatives are :math:`r_x = (1, 0, f_x)` and
+        :math:`r_y = (0, 1, f_y)` so the normal is given directly by
+        :math:`r_x \\times r_y = (-f_x, -f_y, 1)`. The second derivatives
+        only have a :math:`z` component.
+    '''
 
     # Compute surface point normal
-    r_x_cross_y = np.cross(r_x, r_y)
-    n = r_x_cross_y / np.linalg.norm(r_x_cross_y)
+    f_x = 2 * C[4] * x + C[1] + C[3] * y
+    f_y = 2 * C[5] * y + C[2] + C[3] * x
+    norm = np.sqrt(f_x * f_x + f_y * f_y + 1)
+
+    n = np.empty(3, dtype=np.float64)
+    n[0] = -f_x / norm
+    n[1] = -f_y / norm
+    n[2] = 1 / norm
 
     # Compute second fundamental form constants
-    L = np.dot(r_xx, n)
-    M = np.dot(r_xy, n)
-    N = np.dot(r_yy, n)
+    L = 2 * C[4] * n[2]
+    M = C[3] * n[2]
+    N = 2 * C[5] * n[2]
+
+    # Closed-form eigendecomposition of the basis matrix [[L, M], [M, N]],
+    # following LAPACK's 2x2 Schur step (dlanv2) so that the ordering and
+    # signs of the directions match `np.linalg.eig`
+    v1 = np.zeros(3, dtype=np.float64)
+    v2 = np.zeros(3, dtype=np.float64)
+    if M == 0:
+        v1[0] = 1.0
+        v2[1] = 1.0
+        return v1, v2, n
 
-    # Form basis matrix
-    P = np.array([[L, M], [M, N]])
+    p = 0.5 * (L - N)
+    z = p + np.copysign(np.sqrt(p * p + M * M), p)
+    tau = np.sqrt(z * z + M * M)
 
-    # Eigendecomposition, then convert into 3D vector
-    _, V = np.linalg.eig(P)
-    V = np.concatenate((V, np.zeros((1, 2))), axis=0)
+    # Convert into 3D vectors
+    v1[0] = z / tau
+    v1[1] = M / tau
+    v2[0] = -v1[1]
+    v2[1] = v1[0]
 
-    return V[:, 0], V[:, 1], n
+    return v1, v2, n
 
 
 def interpolate_angle(u, v, t, l=90.0):  # noqa: E741
@@ -164,6 +281,7 @@ def interpolate_angle(u, v, t, l=90.0):  # noqa: E741
     return p
 
 
+@numba.njit(cache=True, inline='always')
 def quadratic_surf(x, y, C):
     '''
     Project parameteric coordinates :math:`(x,y)` onto a quadratic surface
@@ -184,6 +302,7 @@ def quadratic_surf(x, y, C):
             C[5] * y * y)
 
 
+@numba.njit(cache=True)
 def quadratic_surf_position(x, y, C):
     '''
     For some mesh-based surface :math:`S`,
@@ -202,11 +321,12 @@ def quadratic_surf_position(x, y, C):
         (3,) :math:`(x,y,f(x,y))` vector
     '''
 
-    # Compute approximate surface at (x,y)
-    z = quadratic_surf(x, y, C)
+    v = np.empty(3, dtype=np.float64)
+    v[0] = x
+    v[1] = y
 
-    # Form input vector
-    v = np.array([x, y, z], dtype=np.float64)
+    # Compute approximate surface at (x,y)
+    v[2] = quadratic_surf(x, y, C)
 
     return v
 
@@ -239,14 +359,56 @@ def quadratic_surf_rotation(x, y, t, C):
         (3,) normal vector
     '''
 
-    v1, v2, n = compute_principal_dir(x, y, C)
-    p = interpolate_angle(v1[:2], v2[:2], t)
+    R, v1, v2, n = quadratic_surf_frame(x, y, C)
+    pp = quadratic_surf_orientation(R, v1, v2, t)
+
+    return pp, n
+
 
+def quadratic_surf_frame(x, y, C):
+    '''
+    Compute the local frame at :math:`(x,y)` on a quadratic surface
+    defined by coefficients :math:`C`. The frame does not depend on the
+    interpolation amount :math:`t` and can be shared across orientations
+    (see :func:`quadratic_surf_orientation`)
+
+    Arguments:
+        x (float): :math:`x` coordinate
+        y (float): :math:`y` coordinate
+        C (ndarray): (6,) surface coefficients
+
+    Returns:
+        R (ndarray): (3,3) rotation of the :math:`z` axis onto the normal
+        v1 (ndarray): (3,) first principal direction
+        v2 (ndarray): (3,) second principal direction
+        n (ndarray): (3,) normal vector
+    '''
+
+    v1, v2, n = compute_principal_dir(x, y, C)
     z = np.array([0, 0, 1], dtype=np.float64)
     R = rotate_vec2vec(z, n)
-    pp = np.matmul(R, p)
+    return R, v1, v2, n
 
-    return pp, n
+
+def quadratic_surf_orientation(R, v1, v2, t):
+    '''
+    Construct an orientation vector from a local quadratic surface frame
+    (see :func:`quadratic_surf_frame`) by interpolating the principal
+    directions :math:`(v1,v2)` by :math:`t`
+
+    Arguments:
+        R (ndarray): (3,3) rotation of the :math:`z` axis onto the normal
+        v1 (ndarray): (3,) first principal direction
+        v2 (ndarray): (3,) second principal direction
+        t (float): Interpolation amount between principal directions.
+            Period of :math:`T=90` is used for interpolation.
+
+    Returns:
+        (3,) :math:`(x,y,z)` direction vector
+    '''
+
+    p = interpolate_angle(v1[:2], v2[:2], t)
+    return R @ p
 
 
 def define_coil_orientation(loc, rot, n):
@@ -290,13 +452,8 @@ def unitize_arr(arr):
         normed (ndarray): (n,p) array where each row is unit length
     '''
 
-    # TODO: Generalize this to p dimensions
-    narr = np.zeros((arr.shape[0], 3), dtype=np.float64)
-
-    for i in np.arange(0, arr.shape[0]):
-        narr[i] = arr[i, :] / np.linalg.norm(arr[i, :])
-
-    return narr
+    norms = np.sqrt((arr * arr).sum(axis=1))
+    return arr / norms.reshape((-1, 1))
 
 
 def compute_parameteric_coordinates(u, v, w):
@@ -306,20 +463,22 @@ def compute_parameteric_coordinates(u, v, w):
     :math:`w = su + tv`
 
     Arguments:
-        u (ndarray): (3,) Axis of parameteric coordinate system
-        v (ndarray): (3,) Secondary axis of parameteric coordinate system
-        w (ndarray): (3,) Point lying on plane spanned by :math:`(u,v)`
+        u (ndarray): (N,3) Axis of parameteric coordinate system
+        v (ndarray): (N,3) Secondary axis of parameteric coordinate system
+        w (ndarray): (N,3) Point lying on plane spanned by :math:`(u,v)`
 
     Returns:
-        s (float): Parameteric coordinate for axis spanned by :math:`u`
-        t (float): Parameteric coordinate for axis spanned by :math:`v`
+        s (ndarray): (N,) Parameteric coordinate for axis spanned by
+            :math:`u`
+        t (ndarray): (N,) Parameteric coordinate for axis spanned by
+            :math:`v`
     '''
 
-    uu = (u * u).sum(axis=1)
-    uv = (u * v).sum(axis=1)
-    vv = (v * v).sum(axis=1)
-    wu = (w * u).sum(axis=1)
-    wv = (w * v).sum(axis=1)
+    uu = np.einsum('ij,ij->i', u, u)
+    uv = np.einsum('ij,ij->i', u, v)
+    vv = np.einsum('ij,ij->i', v, v)
+    wu = np.einsum('ij,ij->i', w, u)
+    wv = np.einsum('ij,ij->i', w, v)
 
     D = (uv * uv) - (uu * vv)
     s = ((uv * wv) - (vv * wu)) / D
@@ -117,12 +117,11 @@ def get_normals(point_tags, all_tags, coords, trigs):
         trigs (ndarray): (P,3) Triangle face array
 
     Returns:
-        (3,) normal vector of patch defined by `point_tags`
+        (3,) unit normal vector of patch defined by `point_tags`
     '''
 
     t_arr = get_relevant_triangles(point_tags, trigs)
-    rel_ind = np.where(t_arr > 0)
-    rel_trig = trigs[rel_ind[0], :]
+    rel_trig = trigs[t_arr > 0]
 
     u_val = np.unique(rel_trig)
     u_ind = np.arange(0, u_val.shape[0])
@@ -130,11 +129,11 @@ def get_normals(point_tags, all_tags, coords, trigs):
     map_func = np.vectorize(lambda x: sort_map[x])
 
     mapped_trigs = map_func(rel_trig)
-    rel_verts = np.where(np.isin(all_tags, u_val))
-    rel_verts_coords = coords[rel_verts, :][0]
+    rel_verts_coords = coords[np.isin(all_tags, u_val)]
 
     norm_array = vertex_normals(mapped_trigs, rel_verts_coords)
-    return norm_array.mean(axis=0)
+    n = norm_array.mean(axis=0)
+    return n / np.linalg.norm(n)
 
 
 def ray_interception(pn, pf, coords, trigs, epsilon=1e-6):
@@ -4,6 +4,7 @@ objects more concisely for running TMS simulation experiments
 '''
 
 import numpy as np
+from scipy.spatial import cKDTree
 from simnibs.msh.mesh_io import read_msh
 
 
@@ -31,6 +32,12 @@ class HeadModel:
         self.coords = head.nodes.node_coord
         self.trigs = head.elm.node_number_list[:, :3].copy()
 
+        # Spatial index over head surface vertices for neighbourhood queries
+        self.kdtree = cKDTree(self.coords)
+
+        # Cropped entity meshes, see `get_entity_mesh`
+        self._entity_meshes = {}
+
     def get_tet_ids(self, tag):
         '''
         Get list of element IDs belonging to `tag`
@@ -43,6 +50,19 @@ class HeadModel:
         '''
         return np.where(self.mesh.elm.tag1 == tag)
 
+    def closest_point(self, p):
+        '''
+        Get closest head surface vertex to each point in `p`
+
+        Arguments:
+            p (ndarray): (3,) point or (N,3) set of points
+
+        Returns:
+            (3,) or (N,3) closest head surface vertex coordinates
+        '''
+        _, ind = self.kdtree.query(p)
+        return self.coords[ind]
+
     def intercept(self, p0, p1, entity):
         '''
         Compute interception distance of a ray defined by :math:`(p0, p1)`
@@ -57,6 +77,23 @@ class HeadModel:
             (3,) interception point
         '''
 
-        tag, elm = entity
-        m = self.mesh.crop_msh(tag).crop_msh(elm)
+        m = self.get_entity_mesh(entity)
         return m.intercept_ray(p0, p1)
+
+    def get_entity_mesh(self, entity):
+        '''
+        Get the sub-mesh belonging to `entity`. Cropping is only
+        performed the first time an entity is requested
+
+        Arguments:
+            entity (tuple): (tag, elm) entity to crop mesh to
+
+        Returns:
+            (simnibs.msh.Msh) cropped mesh
+        '''
+
+        if entity not in self._entity_meshes:
+            tag, elm = entity
+            m = self.mesh.crop_msh(tag).crop_msh(elm)
+            self._entity_meshes[entity] = m
+        return self._entity_meshes[entity]
@@ -5,6 +5,7 @@ Objective function for evaluating TMS field simulations
 
 import logging
 import time
+import atexit
 import multiprocessing as mp
 import copy
 
@@ -73,6 +74,7 @@ class FieldFunc():
                                     nworkers, nthreads)
 
         self.volumes = self.mesh.elements_volumes_and_areas().value[roi]
+        self._weighted_volumes = self.tw * self.volumes
 
     def __repr__(self):
         '''
@@ -103,10 +105,7 @@ class FieldFunc():
         '''
 
         logger.info("Transforming inputs...")
-        return [
-            self.domain.place_coil(self.model, *i, self.normflip)
-            for i in input_list
-        ]
+        return self.domain.place_coils(self.model, input_list, self.normflip)
 
     def evaluate(self, input_list, out_basename=None):
         '''
@@ -127,9 +126,49 @@ class FieldFunc():
         logger.info('Running simulations...')
         E = self.simulator.run_simulation(self.mesh, matsimnibs)
         logger.info('Successfully completed simulations!')
-        scores = (np.linalg.norm(E, axis=1) * self.tw[:, None] *
-                  self.volumes[:, None]).sum(axis=0)
-        return scores
+        return self._score(E)
+
+    def evaluate_pipelined(self, input_lists):
+        '''
+        Evaluate the TMS objective function on a sequence of input
+        batches. The right-hand sides for the next batch are assembled by
+        the simulation workers while the current batch is being solved
+
+        Arguments:
+            input_lists (Iterable[List[tuple(float,float,float)]]): Batches
+                of (N,3) iterables containing (x,y,theta) entries
+
+        Yields:
+            (N,) array of total E-field magnitudes over ROI for each
+                input position of a batch, in batch order
+        '''
+
+        pending = None
+        for input_list in input_lists:
+            matsimnibs = self.place_coils(input_list)
+            submitted = self.simulator.submit_tms_matrices(
+                self.mesh, matsimnibs)
+
+            if pending is not None:
+                logger.info('Running simulations...')
+                yield self._score(self.simulator.solve_tms_matrices(pending))
+            pending = submitted
+
+        if pending is not None:
+            logger.info('Running simulations...')
+            yield self._score(self.simulator.solve_tms_matrices(pending))
+
+    def _score(self, E):
+        '''
+        Compute objective function scores from simulated fields
+
+        Arguments:
+            E (ndarray): (T,3,M) Electric fields for M coil positions
+
+        Returns:
+            (M,) array of weighted E-field magnitudes over ROI
+        '''
+        return self._weighted_volumes @ np.linalg.norm(E, axis=1)
 
     def visualize_evaluate(self,
                            x=None,
@@ -244,6 +283,8 @@ class _Simulator:
         self.didt = didt
         self.coil = coil
         self.num_workers = num_workers if num_workers else 1
+        self._pool = None
+        self._pool_mesh = None
         if nthreads:
             self.set_num_threads(nthreads)
 
@@ -354,6 +395,58 @@ class _Simulator:
 
         return X
 
+    def _get_pool(self, mesh):
+        '''
+        Get the worker pool used to construct right-hand sides. The pool
+        is created once and reused across simulations on the same mesh
+
+        Arguments:
+            mesh (simnibs.msh.Msh): Head model
+
+        Returns:
+            pool (multiprocessing.Pool): Worker pool
+        '''
+        if self._pool is None or self._pool_mesh is not mesh:
+            self.close()
+            self._pool = mp.Pool(processes=self.num_workers,
+                                 initializer=_init_worker,
+                                 initargs=(self, mesh))
+            self._pool_mesh = mesh
+            atexit.register(self.close)
+        return self._pool
+
+    def close(self):
+        '''
+        Shut down the worker pool
+        '''
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._pool_mesh = None
+            atexit.unregister(self.close)
+
+    def submit_tms_matrices(self, mesh, matsimnibs):
+        '''
+        Start constructing the right hand sides of the TMS matrix problem
+        for a set of coil positions on the worker pool
+
+        Arguments:
+            mesh (simnibs.msh.Msh): Head model
+            matsimnibs (List[ndarray]): List of (4,4) matsimnibs matrices
+
+        Returns:
+            pending (multiprocessing.pool.AsyncResult): Pending
+                right-hand sides, see `solve_tms_matrices`
+        '''
+
+        if not isinstance(matsimnibs, list):
+            matsimnibs = [matsimnibs]
+
+        logger.info('Constructing right-hand side of FEM AX=B...')
+        return self._get_pool(mesh).map_async(_prepare_tms_matrix,
+                                              matsimnibs)
+
     def run_simulation(self, mesh, matsimnibs):
         '''
         Run a TMS simulation on mesh with a set of coil positions
@@ -368,32 +461,40 @@ class _Simulator:
                 TMS position problems.
         '''
 
-        if not isinstance(matsimnibs, list):
-            matsimnibs = [matsimnibs]
+        return self.solve_tms_matrices(
+            self.submit_tms_matrices(mesh, matsimnibs))
 
-        logger.info('Constructing right-hand side of FEM AX=B...')
-        start = time.time()
+    def solve_tms_matrices(self, pending):
+        '''
+        Solve the TMS matrix problems submitted with `submit_tms_matrices`
 
-        args = [(mesh, m) for m in matsimnibs]
-        with mp.Pool(processes=self.num_workers) as pool:
-            res = pool.starmap(self.prepare_tms_matrix, args)
-            end = time.time()
-            logger.info(f"Took {end-start:.2f}")
+        Arguments:
+            pending (multiprocessing.pool.AsyncResult): Pending
+                right-hand sides
+
+        Returns:
+            E (ndarray): (T,3,M) Electric field matrix (T,3) for M
+                TMS position problems.
+        '''
+
+        start = time.time()
+        res = pending.get()
+        logger.info(f"Waited {time.time() - start:.2f} for right-hand sides")
 
         # Each column vector is a TMS coil position
-        bs = []
-        dadts = []
-        for b, dadt in res:
-            bs.append(b)
-            dadts.append(dadt.value[self.roi])
-
-        # [Node x problems]
-        B = np.vstack(bs).T
+        # [Node x problems], column-major so each problem is contiguous
+        B = np.empty((res[0][0].shape[0], len(res)), order='F')
+
+        # [Nodes x Directions x Problems]
+        DADT = np.empty((self.D[0].shape[0], 3, len(res)))
+
+        for i, (b, dadt) in enumerate(res):
+            B[:, i] = b
+            DADT[:, :, i] = dadt.value[self.roi]
+
         X = self.solve(B)
 
         logger.info("Computing E")
-        # [Nodes x Directions x Problems]
-        DADT = np.stack(dadts, axis=2)
         E = self.calc_E(X, DADT)
         logger.info("Done")
 
@@ -427,3 +528,36 @@ class _Simulator:
 
         # Return resulting mesh object
         return res
+
+
+# Simulator state shared by all tasks submitted to a worker process
+_worker_state = None
+
+
+def _init_worker(simulator, mesh):
+    '''
+    Store simulator and head model on a worker process so they
+    are transferred once per worker rather than once per task
+
+    Arguments:
+        simulator (_Simulator): Simulation environment
+        mesh (simnibs.msh.mesh_io.Msh): Head model
+    '''
+    global _worker_state
+    _worker_state = (simulator, mesh)
+
+
+def _prepare_tms_matrix(m):
+    '''
+    Construct right hand side of the TMS matrix problem on a worker
+    process initialized with `_init_worker`
+
+    Arguments:
+        m (ndarray): (4,4) Matsimnibs matrix
+
+    Returns:
+        b (ndarray): (N,) RHS of simulation
+        dadt (ndarray): dA/dt for a given TMS coil position
+    '''
+    simulator, mesh = _worker_state
+    return simulator.prepare_tms_matrix(mesh, m)
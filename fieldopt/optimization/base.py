@@ -67,7 +67,18 @@ class IterableOptimizer(ABC):
             obj (ndarray): (N,) Objective vector
         '''
 
-        res = self.obj_func(sampling_points)
+        return self._apply_sign(self.obj_func(sampling_points))
+
+    def _apply_sign(self, res):
+        '''
+        Convert objective function results into a signed objective vector
+
+        Arguments:
+            res (iterable): (N,) Objective function results
+
+        Returns:
+            obj (ndarray): (N,) Objective vector
+        '''
         if not isinstance(res, np.ndarray):
             res = np.array(res)
 
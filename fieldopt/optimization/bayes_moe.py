@@ -2,17 +2,15 @@
 Bayesian optimizer
 """
 
-from collections import deque
-import wrapt
+import os
 import time
 
 import numpy as np
 
 from moe.optimal_learning.python.cpp_wrappers.domain import (
     TensorProductDomain as cTensorProductDomain)
-from moe.optimal_learning.python.python_version.domain import (
-    TensorProductDomain)
-from moe.optimal_learning.python.geometry_utils import ClosedInterval
+from moe.optimal_learning.python.geometry_utils import (
+    ClosedInterval, generate_latin_hypercube_points)
 from moe.optimal_learning.python.cpp_wrappers.expected_improvement import (
     ExpectedImprovement)
 from moe.optimal_learning.python.cpp_wrappers.expected_improvement import (
@@ -21,6 +19,8 @@ from moe.optimal_learning.python.data_containers import (HistoricalData,
                                                          SamplePoint)
 from moe.optimal_learning.python.cpp_wrappers.log_likelihood_mcmc import (
     GaussianProcessLogLikelihoodMCMC)
+from moe.optimal_learning.python.cpp_wrappers.gaussian_process import (
+    GaussianProcess)
 from moe.optimal_learning.python.default_priors import DefaultPrior
 from moe.optimal_learning.python.base_prior import BasePrior
 from moe.optimal_learning.python.cpp_wrappers.optimization import (
@@ -52,15 +52,15 @@ DEFAULT_SGD_PARAMS = {
     "tolerance": 1.0e-10
 }
 
+# Default q-EI monte carlo iterations and optimizer latin hypercube samples
+_NUM_MC = 10000
+_LHC_ITER = 20000
 
-@wrapt.decorator
-def _check_initialized(wrapped, instance, args, kwargs):
-    if instance.gp_loglikelihood is None:
-        logging.error("Model has not been initialized! "
-                      "Use '.step() or .initialize_model()' "
-                      "to initialize optimizer")
-    else:
-        return wrapped(*args, **kwargs)
+
+def _log_uninitialized():
+    logging.error("Model has not been initialized! "
+                  "Use '.step() or .initialize_model()' "
+                  "to initialize optimizer")
 
 
 class BayesianMOEOptimizer(IterableOptimizer):
@@ -82,7 +82,13 @@ class BayesianMOEOptimizer(IterableOptimizer):
                  maximize=False,
                  max_iterations=None,
                  min_iterations=None,
-                 epsilon=1e-3):
+                 epsilon=1e-3,
+                 num_mc=_NUM_MC,
+                 lhc_iter=_LHC_ITER,
+                 max_num_threads=None,
+                 use_gpu=False,
+                 which_gpu=0,
+                 strategy='qei'):
         '''
         Arguments:
             objective_func (callable): Objective function
@@ -103,6 +109,17 @@ class BayesianMOEOptimizer(IterableOptimizer):
             min_iterations (int): Perform at least `min_iterations` before
               stopping optimizations
             epsilon (float): Standard deviation convergence threshold
+            num_mc (int): Number of monte carlo iterations used to
+                compute q-EI
+            lhc_iter (int): Number of latin hypercube samples used by
+                the q-EI optimizer
+            max_num_threads (int): Maximum number of threads used for
+                q-EI optimization [Default: number of CPUs]
+            use_gpu (bool): Compute q-EI monte carlo integration on GPU
+            which_gpu (int): Device ID of GPU to use if `use_gpu`
+            strategy (str): Batch proposal strategy, one of 'qei' (joint
+                q-EI optimization), 'cl_min' or 'cl_mean' (Constant Liar
+                with the minimum or mean observed value as the lie)
         '''
 
         super(BayesianMOEOptimizer, self).__init__(objective_func, maximize)
@@ -110,8 +127,22 @@ class BayesianMOEOptimizer(IterableOptimizer):
         self.epsilon = epsilon
 
         self.dims = bounds.shape[0]
-        self.best_point_history = []
-        self.convergence_buffer = deque(maxlen=minimum_samples)
+
+        # Best sample observed so far, updated as samples are evaluated
+        self._best_coord = None
+        self._best_value = np.inf
+
+        # Ring buffer of best values from the last `minimum_samples`
+        # iterations used to assess convergence
+        self._conv_buf = np.full((minimum_samples, ), np.nan)
+        self._conv_n = 0
+
+        # History of best points, grown if more than the
+        # preallocated number of iterations are performed
+        capacity = max_iterations if max_iterations else 16
+        self._hist_coords = np.empty((capacity, self.dims), dtype=float)
+        self._hist_values = np.empty((capacity, ), dtype=float)
+        self._hist_n = 0
 
         if max_iterations < min_iterations:
             raise ValueError("Minimum number of iterations exceeds "
@@ -120,11 +151,12 @@ class BayesianMOEOptimizer(IterableOptimizer):
         self.max_iter = max_iterations
         self.min_iter = min_iterations
 
-        # non-C++ wrapper needed since it has added functionality
-        # at cost of speed
-        moe_bounds = [ClosedInterval(mn, mx) for mn, mx in bounds]
-        self.search_domain = TensorProductDomain(moe_bounds)
-        self.c_search_domain = cTensorProductDomain(moe_bounds)
+        if strategy not in ('qei', 'cl_min', 'cl_mean'):
+            raise ValueError(f"Unknown sampling strategy {strategy}!")
+        self.strategy = strategy
+
+        self._moe_bounds = [ClosedInterval(mn, mx) for mn, mx in bounds]
+        self.c_search_domain = cTensorProductDomain(self._moe_bounds)
 
         # TODO: Noise modelling will be supported later
         if prior is None:
@@ -141,6 +173,12 @@ class BayesianMOEOptimizer(IterableOptimizer):
 
         self.num_samples = samples_per_iteration
 
+        self.num_mc = int(num_mc)
+        self.lhc_iter = int(lhc_iter)
+        self.max_num_threads = max_num_threads or os.cpu_count()
+        self.use_gpu = use_gpu
+        self.which_gpu = which_gpu
+
     def get_history(self):
         '''
         Retrieve current optimization history
@@ -149,17 +187,14 @@ class BayesianMOEOptimizer(IterableOptimizer):
             history (ndarray): [N, (*inputs, value)] array, where
                 N is the number of points that have been sampled
         '''
-        history = []
-        for c, v in self.best_point_history:
-            history.append(np.array([*c, v]))
-
-        return np.array(history)
+        return np.c_[self._hist_coords[:self._hist_n],
+                     self._hist_values[:self._hist_n]]
 
     def __str__(self):
         return f'''
         Configuration:
         Samples/iteration: {self.num_samples}
-        Minimum Samples: {self.convergence_buffer.maxlen}
+        Minimum Samples: {self._conv_buf.shape[0]}
         Epsilon: {self.epsilon}
         Bounds: {str(self.bounds)}
         Maximize: {self.maximize}
@@ -199,22 +234,45 @@ class BayesianMOEOptimizer(IterableOptimizer):
                             "Use .initialize_model() or .step() to "
                             "initialize GP model")
             return
-        history = self.gp.get_historical_data_copy()
-        best_value = np.min(history._points_sampled_value)
-        best_index = np.argmin(history._points_sampled_value)
-        best_coord = history.points_sampled[best_index]
-        return best_coord, best_value
+        return self._best_coord, self._best_value
+
+    def _update_best(self, sampling_points, res):
+        '''
+        Update the best observed sample with newly evaluated samples
+
+        Arguments:
+            sampling_points (ndarray): (N,P) Evaluated points
+            res (ndarray): (N,) Objective function evaluations
+        '''
+        ind = np.argmin(res)
+        if res[ind] < self._best_value:
+            self._best_coord = sampling_points[ind]
+            self._best_value = res[ind]
 
     @property
     def _buffer_filled(self):
-        return len(self.convergence_buffer) == self.convergence_buffer.maxlen
+        return self._conv_n >= self._conv_buf.shape[0]
 
     @property
     def converged(self):
         '''
         Evaluates whether Bayesian optimization has converged.
-        Examines whether the standard deviation of the history of length
-        `self.min_samples` is below `self.epsilon`
+        Examines whether the standard deviation of the best values over the
+        last `minimum_samples` iterations is below `self.epsilon`
+
+        Returns:
+            converged (bool): False if stop criterion has not been met,
+            else True
+        '''
+        return self._check_convergence()
+
+    def _check_convergence(self, criterion=None):
+        '''
+        Evaluate the stop criteria (see `converged`)
+
+        Arguments:
+            criterion (float): Precomputed convergence criterion, computed
+                if not provided and required
 
         Returns:
             converged (bool): False if stop criterion has not been met,
@@ -235,19 +293,27 @@ class BayesianMOEOptimizer(IterableOptimizer):
         if self.gp_loglikelihood is None:
             return False
 
-        criterion = self._compute_convergence_criterion()
+        if criterion is None:
+            criterion = self._compute_convergence_criterion()
         logging.debug(f"Buffer standard deviation: {criterion}")
         return criterion < self.epsilon
 
-    @_check_initialized
     def _compute_convergence_criterion(self):
         '''
-        Compute the convergence criterion (sample standard deviation)
-        of the past self.min_samples evaluations
+        Compute the convergence criterion (standard deviation)
+        of the best values over the last `minimum_samples` iterations
+
+        Returns:
+            criterion (float): Convergence criterion, None if fewer than
+                `minimum_samples` iterations have been performed
         '''
-        _, best = self.current_best
-        deviation = np.linalg.norm(np.array(self.convergence_buffer) - best)
-        return deviation
+        if self.gp_loglikelihood is None:
+            return _log_uninitialized()
+
+        if not self._buffer_filled:
+            return
+
+        return self._conv_buf.std()
 
     def initialize_model(self):
         '''
@@ -261,12 +327,15 @@ class BayesianMOEOptimizer(IterableOptimizer):
 
         self.iteration = 0
         logging.debug(f"Initializing model with {self.num_samples} samples")
-        init_pts = self.search_domain\
-            .generate_uniform_random_points_in_domain(self.num_samples)
+        init_pts = generate_latin_hypercube_points(self.num_samples,
+                                                   self._moe_bounds)
 
         res = self.evaluate_objective(init_pts)
         logging.debug(f"Initial samples: {init_pts}")
 
+        self._best_value = np.inf
+        self._update_best(init_pts, res)
+
         history = HistoricalData(dim=self.dims, num_derivatives=0)
         history.append_sample_points(
             [SamplePoint(i, o, 0.0) for i, o in zip(init_pts, res)])
@@ -283,7 +352,6 @@ class BayesianMOEOptimizer(IterableOptimizer):
         self.gp_loglikelihood.train()
         return init_pts, res
 
-    @_check_initialized
     def _update_model(self, evidence):
         '''
         Updates the current ensemble of models with
@@ -292,32 +360,76 @@ class BayesianMOEOptimizer(IterableOptimizer):
         Arguments:
             evidence (SamplePoint): New SamplePoint data
         '''
+        if self.gp_loglikelihood is None:
+            return _log_uninitialized()
+
         self.gp_loglikelihood.add_sampled_points(evidence)
         self.gp_loglikelihood.train()
         return
 
-    @_check_initialized
     def _update_history(self):
         '''
         Update the history of best points with the
         current best point and value
         '''
+        if self.gp_loglikelihood is None:
+            return _log_uninitialized()
+
         best_coord, best_value = self.current_best
-        self.best_point_history.append((best_coord, best_value))
 
-    @_check_initialized
+        if self._hist_n == self._hist_values.shape[0]:
+            self._grow_history()
+
+        self._hist_coords[self._hist_n] = best_coord
+        self._hist_values[self._hist_n] = best_value
+        self._hist_n += 1
+
+    def _grow_history(self):
+        '''
+        Double the capacity of the best point history arrays
+        '''
+        capacity = 2 * self._hist_values.shape[0]
+
+        coords = np.empty((capacity, self.dims), dtype=float)
+        coords[:self._hist_n] = self._hist_coords[:self._hist_n]
+        values = np.empty((capacity, ), dtype=float)
+        values[:self._hist_n] = self._hist_values[:self._hist_n]
+
+        self._hist_coords = coords
+        self._hist_values = values
+
     def propose_sampling_points(self):
         '''
         Performs stochastic gradient descent to optimize qEI function
         returning a list of optimal candidate points for the current
-        set of ensemble models
+        set of ensemble models. If a Constant Liar strategy is used
+        the points are instead selected one at a time
 
         Returns:
             samples (ndarray): (N,P) Set of q-EI optimal samples to evaluate
-            ei (float): q-Expected improvement
+            ei (float): q-Expected improvement of the full batch of `samples`
         '''
-        samples, ei = _gen_sample_from_qei(self.gp, self.c_search_domain,
-                                           self.sgd, self.num_samples)
+        if self.gp_loglikelihood is None:
+            return _log_uninitialized()
+
+        if self.strategy == 'qei':
+            sampler = _gen_sample_from_qei
+            kwargs = {}
+        else:
+            sampler = _gen_sample_from_constant_liar
+            kwargs = {'lie': self.strategy[3:]}
+
+        samples, ei = sampler(
+            self.gp,
+            self.c_search_domain,
+            self.sgd,
+            self.num_samples,
+            **kwargs,
+            num_mc=self.num_mc,
+            lhc_iter=self.lhc_iter,
+            max_num_threads=self.max_num_threads,
+            use_gpu=self.use_gpu,
+            which_gpu=self.which_gpu)
         return samples, ei
 
     def step(self):
@@ -344,6 +456,7 @@ class BayesianMOEOptimizer(IterableOptimizer):
             logging.debug(f"Sampling points: {str(sampling_points)}")
             logging.debug(f"q-Expected Improvement: {qEI}")
             res = self.evaluate_objective(sampling_points)
+            self._update_best(sampling_points, res)
             evidence = [
                 SamplePoint(c, v, 0.0) for c, v in zip(sampling_points, res)
             ]
@@ -351,7 +464,8 @@ class BayesianMOEOptimizer(IterableOptimizer):
         self._update_history()
 
         _, best = self.current_best
-        self.convergence_buffer.append(best)
+        self._conv_buf[self._conv_n % self._conv_buf.shape[0]] = best
+        self._conv_n += 1
         self._increment()
 
         return sampling_points, res, qEI
@@ -363,7 +477,8 @@ class BayesianMOEOptimizer(IterableOptimizer):
         Yields:
             iter_result (dict): Iteration tracking information
         '''
-        while not self.converged:
+        converged = self.converged
+        while not converged:
 
             start = time.time()
             sampling_points, res, qEI = self.step()
@@ -374,6 +489,8 @@ class BayesianMOEOptimizer(IterableOptimizer):
             else:
                 criterion = None
 
+            converged = self._check_convergence(criterion)
+
             out = {
                 "best_point": best_point,
                 "best_value": best_val,
@@ -382,7 +499,7 @@ class BayesianMOEOptimizer(IterableOptimizer):
                 "result": res,
                 "qei": qEI,
                 "criterion": criterion,
-                "converged": self.converged
+                "converged": converged
             }
 
             if print_status:
@@ -391,8 +508,7 @@ class BayesianMOEOptimizer(IterableOptimizer):
                 logging.info(f"Best Value: {self.sign * best_val}")
                 logging.info(f"Criterion: {criterion}")
                 logging.info(f"qEI: {qEI}")
-                logging.info(
-                    f"Converged" if self.converged else "Not Converged")
+                logging.info("Converged" if converged else "Not Converged")
                 logging.info("-----------------------------------------------")
 
             yield out
@@ -444,7 +560,11 @@ def _gen_sample_from_qei(gp,
                          search_domain,
                          sgd_params,
                          num_samples,
-                         num_mc=1e4):
+                         num_mc=_NUM_MC,
+                         lhc_iter=_LHC_ITER,
+                         max_num_threads=8,
+                         use_gpu=False,
+                         which_gpu=0):
     '''
     Perform multistart stochastic gradient descent (MEIO)
     on the q-EI of a gaussian process model with
@@ -457,6 +577,10 @@ def _gen_sample_from_qei(gp,
         num_samples     Number of samples to maximize over
         num_mc          Number of monte carlo sampling iterations to
                         perform to compute integral
+        lhc_iter        Number of latin hypercube samples for optimizer
+        max_num_threads Maximum number of threads to use for optimization
+        use_gpu         Whether to compute monte carlo integration on GPU
+        which_gpu       Device ID of GPU to use
 
     Returns:
         points_to_sample    Optimal samples to evaluate
@@ -464,16 +588,81 @@ def _gen_sample_from_qei(gp,
     '''
 
     qEI = ExpectedImprovement(gaussian_process=gp,
-                              num_mc_iterations=int(num_mc))
+                              num_mc_iterations=num_mc)
 
-    # lhc_iter=2e4 doesn't actually matter since we're using SGD
-    optimizer = cGDOpt(search_domain, qEI, sgd_params, int(2e4))
+    # lhc_iter doesn't actually matter since we're using SGD
+    optimizer = cGDOpt(search_domain, qEI, sgd_params, lhc_iter)
     points_to_sample = meio(optimizer,
                             None,
                             num_samples,
-                            use_gpu=False,
-                            which_gpu=0,
-                            max_num_threads=8)
-    qEI.set_current_point(points_to_sample[0])
+                            use_gpu=use_gpu,
+                            which_gpu=which_gpu,
+                            max_num_threads=max_num_threads)
+    qEI.set_current_point(points_to_sample)
+
+    return points_to_sample, qEI.compute_expected_improvement()
+
+
+def _gen_sample_from_constant_liar(gp,
+                                   search_domain,
+                                   sgd_params,
+                                   num_samples,
+                                   lie='min',
+                                   num_mc=_NUM_MC,
+                                   lhc_iter=_LHC_ITER,
+                                   max_num_threads=8,
+                                   use_gpu=False,
+                                   which_gpu=0):
+    '''
+    Select a batch of samples using the Constant Liar heuristic
+    (Ginsbourger et al. 2010). Points are chosen one at a time by
+    maximizing 1-point EI, after each selection the point is added
+    to a scratch copy of the gaussian process model with a fixed
+    (lied about) objective value
+
+    Arguments:
+        gp              Gaussian process model
+        search_domain   Input domain of gaussian process model
+        sgd_params      Stochastic gradient descent parameters
+        num_samples     Number of samples to select
+        lie             Observed value statistic to use as the lie,
+                        one of 'min' or 'mean'
+        num_mc          Number of monte carlo sampling iterations to
+                        perform to compute q-EI of the batch
+        lhc_iter        Number of latin hypercube samples for optimizer
+        max_num_threads Maximum number of threads to use for optimization
+        use_gpu         Whether to compute monte carlo integration on GPU
+        which_gpu       Device ID of GPU to use
+
+    Returns:
+        points_to_sample    Selected samples to evaluate
+        qEI                 q-Expected Improvement of `points_to_sample`
+    '''
+
+    history = gp.get_historical_data_copy()
+    if lie == 'min':
+        lie_value = np.min(history.points_sampled_value)
+    else:
+        lie_value = np.mean(history.points_sampled_value)
+
+    scratch_gp = GaussianProcess(gp.get_covariance_copy(), history, [])
+    points_to_sample = np.empty((num_samples, history.dim), dtype=float)
+    for i in range(num_samples):
+        point, _ = _gen_sample_from_qei(scratch_gp,
+                                        search_domain,
+                                        sgd_params,
+                                        1,
+                                        num_mc=num_mc,
+                                        lhc_iter=lhc_iter,
+                                        max_num_threads=max_num_threads,
+                                        use_gpu=use_gpu,
+                                        which_gpu=which_gpu)
+        points_to_sample[i] = point[0]
+        scratch_gp.add_sampled_points(
+            [SamplePoint(points_to_sample[i], lie_value, 0.0)])
+
+    qEI = ExpectedImprovement(gaussian_process=gp,
+                              num_mc_iterations=num_mc)
+    qEI.set_current_point(points_to_sample)
 
     return points_to_sample, qEI.compute_expected_improvement()
@@ -2,7 +2,6 @@
 Grid Optimizer
 """
 import numpy as np
-from sklearn.utils.extmath import cartesian
 import time
 
 from .base import IterableOptimizer
@@ -21,7 +20,8 @@ class GridOptimizer(IterableOptimizer):
                  batchsize,
                  sampling_density,
                  bounds,
-                 maximize=True):
+                 maximize=True,
+                 pipelined_func=None):
         '''
         Arguments:
             objective_func (callable): Objective Function
@@ -30,22 +30,31 @@ class GridOptimizer(IterableOptimizer):
                 for a dimension :math:`p`
             bounds (ndarray): (P,2) Array where each row corresponds
                 to the (min, max) for a dimension :math:`p`
+            pipelined_func (callable): Generator function taking an
+                iterable of batches and yielding the objective function
+                evaluations of each batch in order (see `iter_pipelined`).
+                [Default: evaluate `objective_func` on each batch]
         '''
         super(GridOptimizer, self).__init__(objective_func, maximize)
+        self.pipelined_func = pipelined_func
 
         # Construct Grid
         dim_samples = [
             np.linspace(b[0], b[1], d)
             for b, d in zip(bounds, sampling_density)
         ]
-        self.grid = cartesian(dim_samples)
+        self.grid = np.stack(np.meshgrid(*dim_samples, indexing='ij'),
+                             axis=-1).reshape(-1, len(dim_samples))
 
-        # Construct batches for evaluation
-        divisions = np.arange(batchsize, self.grid.shape[0], batchsize)
-        self.batches = np.split(self.grid, divisions)
+        # Batches for evaluation are contiguous blocks of the grid
         self.batchsize = batchsize
-        logging.info(f"Will perform {len(self.batches)} iterations")
-        self.history = np.zeros((self.grid.shape[0], ), dtype=float)
+        self.num_batches = (self.grid.shape[0] + batchsize - 1) // batchsize
+        logging.info(f"Will perform {self.num_batches} iterations")
+        self.history = np.full((self.grid.shape[0], ), np.inf)
+
+        # Running best, updated as batches are evaluated
+        self._best_idx = -1
+        self._best_val = np.inf
 
     def __str__(self):
         return f'''
@@ -66,7 +75,14 @@ class GridOptimizer(IterableOptimizer):
         Returns:
             completed (bool): Whether optimization is complete
         """
-        return self.iteration >= len(self.batches)
+        return self.iteration >= self.num_batches
+
+    @property
+    def _num_evaluated(self):
+        '''
+        Number of grid points that have been evaluated
+        '''
+        return min(self.iteration * self.batchsize, self.grid.shape[0])
 
     @property
     def current_best(self):
@@ -83,10 +99,7 @@ class GridOptimizer(IterableOptimizer):
             logging.error("No iterations have yet been performed!")
             return
 
-        ind = np.argmin(self.history)
-        best_coord = self.grid[ind]
-        best_value = self.history[ind]
-        return best_coord, best_value
+        return self.grid[self._best_idx], self._best_val
 
     def get_history(self):
         '''
@@ -97,9 +110,21 @@ class GridOptimizer(IterableOptimizer):
                 N is the number of points that have been sampled
         '''
 
-        evaluated_points = np.vstack(self.batches[:self.iteration])
-        best_values = self.history[:evaluated_points.shape[0]]
-        return np.c_[evaluated_points, best_values]
+        n_eval = self._num_evaluated
+        return np.concatenate(
+            [self.grid[:n_eval], self.history[:n_eval, None]], axis=1)
+
+    def _batch(self, i):
+        '''
+        Get the :math:`i`th batch of sampling points
+
+        Arguments:
+            i (int): Batch index
+
+        Returns:
+            batch (ndarray): (N,P) view of up to self.batchsize grid points
+        '''
+        return self.grid[i * self.batchsize:(i + 1) * self.batchsize]
 
     def step(self):
         '''
@@ -114,16 +139,48 @@ class GridOptimizer(IterableOptimizer):
         if self.completed:
             raise StopIteration
 
-        sampling_points = self.batches[self.iteration]
+        sampling_points = self._batch(self.iteration)
         logging.debug(f"Sampling: {str(sampling_points)}")
         res = self.evaluate_objective(sampling_points)
+        self._record(res)
+        return sampling_points, res
+
+    def _record(self, res):
+        '''
+        Store evaluations of the current batch and advance to the next
 
+        Arguments:
+            res (ndarray): Objective function evaluations of the current batch
+        '''
         block_start = self.iteration * self.batchsize
         block_end = block_start + len(res)
         self.history[block_start:block_end] = res
 
+        local_best = np.argmin(res)
+        if res[local_best] < self._best_val:
+            self._best_val = res[local_best]
+            self._best_idx = block_start + local_best
+
         self._increment()
-        return sampling_points, res
+
+    def _iter_result(self, sampling_points, res, start, print_status):
+        best_point, best_val = self.current_best
+        out = {
+            "best_point": best_point,
+            "best_value": best_val,
+            "iteration": self.iteration,
+            "samples": sampling_points,
+            "result": res
+        }
+
+        if print_status:
+            logging.info(f"Duration: {time.time() - start}")
+            logging.info(f"Iteration: {self.iteration}")
+            logging.info(f"Best Value: {self.sign * best_val}")
+            logging.info(f"Complete" if self.completed else "Not Completed")
+            logging.info("-----------------------------------------------")
+
+        return out
 
     def iter(self, print_status=False):
         '''
@@ -137,24 +194,37 @@ class GridOptimizer(IterableOptimizer):
 
             start = time.time()
             sampling_points, res = self.step()
-            best_point, best_val = self.current_best
-            out = {
-                "best_point": best_point,
-                "best_value": best_val,
-                "iteration": self.iteration,
-                "samples": sampling_points,
-                "result": res
-            }
-
-            if print_status:
-                logging.info(f"Duration: {time.time() - start}")
-                logging.info(f"Iteration: {self.iteration}")
-                logging.info(f"Best Value: {self.sign * best_val}")
-                logging.info(
-                    f"Complete" if self.completed else "Not Completed")
-                logging.info("-----------------------------------------------")
-
-            yield out
+            yield self._iter_result(sampling_points, res, start, print_status)
+
+    def iter_pipelined(self, print_status=False):
+        '''
+        Generator for end-to-end optimization where all remaining batches
+        are handed to `pipelined_func` up front, allowing the objective
+        function to prepare the next batch while the current one is
+        evaluated. Results are recorded and yielded in batch order,
+        identical to `iter`
+
+        Arguments:
+            print_status (bool): Log status after each iteration
+
+        Yields:
+            iter_result (dict): Iteration tracking information
+        '''
+
+        batches = (self._batch(i)
+                   for i in range(self.iteration, self.num_batches))
+        if self.pipelined_func is None:
+            results = map(self.obj_func, batches)
+        else:
+            results = self.pipelined_func(batches)
+
+        start = time.time()
+        for res in results:
+            sampling_points = self._batch(self.iteration)
+            res = self._apply_sign(res)
+            self._record(res)
+            yield self._iter_result(sampling_points, res, start, print_status)
+            start = time.time()
 
 
 def get_default_tms_optimizer(f, locdim, rotdim):
@@ -182,4 +252,8 @@ def get_default_tms_optimizer(f, locdim, rotdim):
     batchsize = f.simulator.num_workers
     bounds = f.domain.bounds
     bounds[2, :] = np.array([0, 180])
-    return GridOptimizer(f.evaluate, batchsize, sampling, bounds)
+    return GridOptimizer(f.evaluate,
+                         batchsize,
+                         sampling,
+                         bounds,
+                         pipelined_func=f.evaluate_pipelined)
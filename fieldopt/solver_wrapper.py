@@ -65,7 +65,7 @@ class PETSc:
         Returns:
             X (ndarray): (N,P) Solutions matrix
         """
-        petsc_solver.petsc_solve(self.solver_opt, self.A, B)
+        return petsc_solver.petsc_solve(self.solver_opt, self.A, B)
 
 
 def get_solver(solver, A):
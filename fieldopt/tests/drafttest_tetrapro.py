@@ -28,7 +28,7 @@ def gen_fully_embedded_tet(n,shape):
     tetrahedral vertices in voxel i,j,k
     '''
 
-    node_ids = np.ones((n,4),dtype=np.int).cumsum().reshape((n,4)) - 1
+    node_ids = np.ones((n,4),dtype=np.int64).cumsum().reshape((n,4)) - 1
     coord_array = np.zeros((n*4,3))
     for i in np.arange(0,n):
 
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+## Tests for the Bayesian optimizer batch proposal strategies
+##
+## Tests implemented:
+##
+##     1. Unknown strategies are rejected
+##     2. Strategies dispatch to the matching sampler
+##     3. Constant Liar adds lies to a scratch model only
+##     4. Convergence uses the std of the last `minimum_samples` best values
+##
+
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("moe")
+
+from fieldopt.optimization import bayes_moe  # noqa: E402
+
+BOUNDS = np.array([[0, 1], [0, 1], [0, 180]], dtype=float)
+
+
+def make_optimizer(**kwargs):
+    return bayes_moe.BayesianMOEOptimizer(lambda x: np.zeros(len(x)),
+                                          3,
+                                          BOUNDS,
+                                          max_iterations=5,
+                                          min_iterations=1,
+                                          **kwargs)
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        make_optimizer(strategy='cl_max')
+
+
+@pytest.mark.parametrize("strategy,sampler,lie",
+                         [('qei', '_gen_sample_from_qei', None),
+                          ('cl_min', '_gen_sample_from_constant_liar', 'min'),
+                          ('cl_mean', '_gen_sample_from_constant_liar',
+                           'mean')])
+def test_strategy_dispatches_to_sampler(monkeypatch, strategy, sampler, lie):
+    '''
+    propose_sampling_points should use the sampler and lie matching the
+    configured strategy
+    '''
+
+    calls = []
+
+    def fake_sampler(gp, search_domain, sgd_params, num_samples, **kwargs):
+        calls.append((sampler, num_samples, kwargs.get('lie')))
+        return np.zeros((num_samples, 3)), 0.5
+
+    monkeypatch.setattr(bayes_moe, sampler, fake_sampler)
+
+    opt = make_optimizer(strategy=strategy)
+    opt.gp_loglikelihood = types.SimpleNamespace(models=[object()])
+    samples, ei = opt.propose_sampling_points()
+
+    assert calls == [(sampler, 3, lie)]
+    assert samples.shape == (3, 3)
+    assert ei == 0.5
+
+
+def test_constant_liar_lies_to_scratch_model(monkeypatch):
+    '''
+    Each selected point is added to the scratch model with the lie value
+    before the next point is selected, and the batch q-EI is computed on
+    the original model
+    '''
+
+    class FakeHistory:
+        dim = 3
+        points_sampled_value = np.array([3., 1., 2.])
+
+    class FakeGP:
+        def __init__(self, *args):
+            self.lies = []
+
+        def get_historical_data_copy(self):
+            return FakeHistory()
+
+        def get_covariance_copy(self):
+            return None
+
+        def add_sampled_points(self, points):
+            self.lies.extend(points)
+
+    class FakeEI:
+        def __init__(self, gaussian_process, num_mc_iterations):
+            self.gp = gaussian_process
+
+        def set_current_point(self, points):
+            self.points = points
+
+        def compute_expected_improvement(self):
+            return (self.gp, self.points.shape)
+
+    def fake_qei(gp, search_domain, sgd_params, num_samples, **kwargs):
+        assert num_samples == 1
+        return np.full((1, 3), len(gp.lies), dtype=float), None
+
+    monkeypatch.setattr(bayes_moe, 'GaussianProcess', FakeGP)
+    monkeypatch.setattr(bayes_moe, 'ExpectedImprovement', FakeEI)
+    monkeypatch.setattr(bayes_moe, '_gen_sample_from_qei', fake_qei)
+
+    gp = FakeGP()
+    points, (ei_gp, ei_shape) = bayes_moe._gen_sample_from_constant_liar(
+        gp, None, None, 4, lie='mean')
+
+    assert np.array_equal(points[:, 0], np.arange(4))
+    assert ei_gp is gp and ei_shape == (4, 3)
+    assert gp.lies == []
+
+
+def test_convergence_uses_std_of_recent_best_values(monkeypatch):
+    '''
+    The convergence criterion is the standard deviation of the best values
+    over the last `minimum_samples` iterations, and is undefined until
+    `minimum_samples` iterations have been performed
+    '''
+
+    best_values = iter([-1., -2., -3., -3., -3.])
+
+    def fake_initialize_model(self):
+        self.gp_loglikelihood = object()
+        self._update_best(np.zeros((3, 3)), np.zeros(3))
+        return np.zeros((3, 3)), np.zeros(3)
+
+    def fake_update_best(self, sampling_points, res):
+        self._best_coord = np.zeros(3)
+        self._best_value = next(best_values)
+
+    monkeypatch.setattr(bayes_moe.BayesianMOEOptimizer, 'initialize_model',
+                        fake_initialize_model)
+    monkeypatch.setattr(bayes_moe.BayesianMOEOptimizer,
+                        'propose_sampling_points',
+                        lambda self: (np.zeros((3, 3)), 0.5))
+    monkeypatch.setattr(bayes_moe.BayesianMOEOptimizer, '_update_model',
+                        lambda self, evidence: None)
+    monkeypatch.setattr(bayes_moe.BayesianMOEOptimizer, '_update_best',
+                        fake_update_best)
+    monkeypatch.setattr(bayes_moe, 'SamplePoint', lambda *args: args)
+
+    opt = bayes_moe.BayesianMOEOptimizer(lambda x: np.zeros(len(x)),
+                                         3,
+                                         BOUNDS,
+                                         minimum_samples=3,
+                                         max_iterations=6,
+                                         min_iterations=1,
+                                         epsilon=1e-6)
+
+    out = list(opt.iter())
+    criteria = [o['criterion'] for o in out]
+    converged = [o['converged'] for o in out]
+
+    assert criteria[:2] == [None, None]
+    assert np.allclose(criteria[2:],
+                       [np.std([-1, -2, -3]),
+                        np.std([-2, -3, -3]), 0])
+    assert converged == [False, False, False, False, True]
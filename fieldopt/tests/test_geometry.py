@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+## Tests for compiled geometry routines
+##
+## Tests implemented:
+##
+##     1. Quadratic fit matches least squares for well-posed neighbourhoods
+##     2. Quadratic fit returns minimum-norm solution for degenerate inputs
+##     3. Principal directions match np.linalg.eig ordering and signs
+##     4. Vector-to-vector rotations, including (anti)parallel vectors
+##
+
+import numpy as np
+from fieldopt.geometry import geometry
+
+
+def quad_design_matrix(X):
+    x, y = X[:, 0], X[:, 1]
+    return np.c_[np.ones_like(x), x, y, x * y, x * x, y * y]
+
+
+def test_quad_fit_matches_least_squares():
+    '''
+    Well-posed local neighbourhood should match least squares solution
+    of the design matrix
+    '''
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(-8, 8, size=(60, 2))
+    b = rng.normal(size=60)
+
+    expected, _, _, _ = np.linalg.lstsq(quad_design_matrix(X), b, rcond=None)
+    assert np.allclose(geometry.quad_fit(X, b), expected)
+
+
+def test_quad_fit_degenerate_returns_minimum_norm():
+    '''
+    Neighbourhoods that do not determine a unique quadratic surface
+    (too few points, collinear points) should return the minimum-norm
+    least squares solution rather than raising
+    '''
+
+    rng = np.random.default_rng(1)
+    t = np.linspace(-5, 5, 20)
+    cases = [rng.normal(size=(3, 2)), np.c_[t, 2 * t + 1]]
+
+    for X in cases:
+        b = rng.normal(size=X.shape[0])
+        expected, _, _, _ = np.linalg.lstsq(quad_design_matrix(X),
+                                            b,
+                                            rcond=None)
+        C = geometry.quad_fit(X, b)
+        assert np.all(np.isfinite(C))
+        assert np.allclose(C, expected)
+
+
+def eig_principal_dir(x, y, C):
+    '''
+    Reference principal directions using np.linalg.eig on the
+    second fundamental form basis matrix
+    '''
+    r_x = np.array([1, 0, 2 * C[4] * x + C[1] + C[3] * y])
+    r_y = np.array([0, 1, 2 * C[5] * y + C[2] + C[3] * x])
+    n = np.cross(r_x, r_y)
+    n = n / np.linalg.norm(n)
+
+    P = np.array([[2 * C[4], C[3]], [C[3], 2 * C[5]]]) * n[2]
+    _, V = np.linalg.eig(P)
+    V = np.concatenate((V, np.zeros((1, 2))), axis=0)
+    return V[:, 0], V[:, 1], n
+
+
+def test_principal_dir_matches_eig():
+    '''
+    Closed-form principal directions must match np.linalg.eig exactly,
+    including ordering and sign, so that coil orientations for a given
+    (x, y, theta) are unchanged. Covers M == 0, L == N and L < N
+    '''
+
+    rng = np.random.default_rng(2)
+    Cs = list(rng.normal(size=(500, 6)))
+
+    # M == 0
+    Cs += [np.array([0.1, 0.2, -0.3, 0, 1, 2]),
+           np.array([0.1, 0.2, -0.3, 0, 2, 1])]
+
+    # L == N
+    Cs += [np.array([0.1, 0.2, -0.3, 0.5, 1, 1]),
+           np.array([0.1, 0.2, -0.3, -0.5, 1, 1]),
+           np.array([0.1, 0.2, -0.3, 0, 1, 1])]
+
+    # L < N
+    Cs += [np.array([0.1, 0.2, -0.3, 0.5, -1, 2]),
+           np.array([0.1, 0.2, -0.3, -0.5, 0.5, 1])]
+
+    for C in Cs:
+        for x, y in rng.normal(size=(4, 2)):
+            result = geometry.compute_principal_dir(x, y, C)
+            expected = eig_principal_dir(x, y, C)
+            for r, e in zip(result, expected):
+                assert np.allclose(r, e, atol=1e-10)
+
+
+def random_unit_vectors(rng, n):
+    v = rng.normal(size=(n, 3))
+    return v / np.linalg.norm(v, axis=1)[:, None]
+
+
+def assert_rotation(R):
+    assert np.all(np.isfinite(R))
+    assert np.allclose(R @ R.T, np.eye(3))
+    assert np.isclose(np.linalg.det(R), 1)
+
+
+def test_rotate_vec2vec():
+    '''
+    Rotation maps v1 onto v2 for random, antiparallel and parallel unit
+    vector pairs, including the integer z axis used by
+    `QuadraticDomain._construct_local_quadric`
+    '''
+
+    rng = np.random.default_rng(3)
+    z = np.array([0, 0, 1])
+    V1 = random_unit_vectors(rng, 50)
+    V2 = random_unit_vectors(rng, 50)
+
+    for v1, v2 in zip(V1, V2):
+        for a, b in [(v1, v2), (v1, z), (z, v1)]:
+            R = geometry.rotate_vec2vec(a, b)
+            assert_rotation(R)
+            assert np.allclose(R @ a, b)
+
+    # Antiparallel vectors
+    for v in list(V1) + [z, -z]:
+        R = geometry.rotate_vec2vec(v, -v)
+        assert_rotation(R)
+        assert np.allclose(R @ v, -v)
+
+    # Parallel vectors
+    for v in list(V1) + [z]:
+        assert np.allclose(geometry.rotate_vec2vec(v, v), np.eye(3))
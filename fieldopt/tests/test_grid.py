@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+## Tests for the grid optimizer
+##
+## Tests implemented:
+##
+##     1. Pipelined iteration matches sequential iteration
+##     2. Pipelined iteration uses the provided pipelined objective
+##
+
+import numpy as np
+from fieldopt.optimization.grid import GridOptimizer
+
+BOUNDS = np.array([[0, 1], [-1, 1], [0, 180]], dtype=float)
+SAMPLING = (4, 5, 3)
+
+
+def objective(x):
+    return -((x[:, :2] - 0.3)**2).sum(axis=1) + x[:, 2] / 1000
+
+
+def lookahead_objective(batches):
+    '''
+    Pipelined objective that pulls the next batch before yielding the
+    results of the current one
+    '''
+    pending = None
+    for batch in batches:
+        if pending is not None:
+            yield objective(pending)
+        pending = batch.copy()
+
+    if pending is not None:
+        yield objective(pending)
+
+
+def assert_same_run(a, b):
+    for x, y in zip(a.iter(), b.iter_pipelined()):
+        assert x['iteration'] == y['iteration']
+        assert np.array_equal(x['samples'], y['samples'])
+        assert np.array_equal(x['result'], y['result'])
+        assert np.array_equal(x['best_point'], y['best_point'])
+        assert x['best_value'] == y['best_value']
+
+    assert a.completed and b.completed
+    assert np.array_equal(a.get_history(), b.get_history())
+    assert np.array_equal(a.current_best[0], b.current_best[0])
+    assert a.current_best[1] == b.current_best[1]
+
+
+def test_pipelined_iteration_matches_iteration():
+    '''
+    Default pipelined iteration should record the same history and
+    best point as sequential iteration, including a partial final batch
+    '''
+
+    for maximize in [True, False]:
+        a = GridOptimizer(objective, 7, SAMPLING, BOUNDS, maximize=maximize)
+        b = GridOptimizer(objective, 7, SAMPLING, BOUNDS, maximize=maximize)
+        assert_same_run(a, b)
+
+
+def test_pipelined_iteration_uses_pipelined_func():
+    '''
+    A pipelined objective that looks ahead by a batch should give the same
+    results as sequential iteration
+    '''
+
+    a = GridOptimizer(objective, 8, SAMPLING, BOUNDS)
+    b = GridOptimizer(None, 8, SAMPLING, BOUNDS,
+                      pipelined_func=lookahead_objective)
+    assert_same_run(a, b)
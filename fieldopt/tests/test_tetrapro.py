@@ -31,28 +31,16 @@ def gen_fully_embedded_tet(n,shape):
     tetrahedral vertices in voxel i,j,k
     '''
 
-    node_ids = np.ones((n,4), dtype=np.int).cumsum().reshape((n,4)) - 1
-    coord_array = np.zeros((n*4,3))
-    for i in np.arange(0,n):
+    node_ids = np.arange(4*n, dtype=np.int64).reshape((n,4))
+    #Table of voxel (i,j,k) indices in linear ordering, i varying fastest
+    voxels = np.mgrid[:shape[0],:shape[1],:shape[2]].reshape(3,-1,order='F').T
 
-        #Select voxel in shape
-        step_z = i // (shape[0] * shape[1])
-        step_y = i // (shape[0]) - shape[2]*step_z
-        step_x = i - shape[1]*step_y - shape[1]*shape[2]*step_z
-        selected_vox=(step_x,step_y,step_z)
+    #Select voxel in shape for each tetrahedron
+    selected_vox = voxels[:n]
 
-        #Generate 4 sets of random integers within the boundaries defined by voxel
-        rand_coords = np.random.random(size=(4,3))
-
-        #Modify each value generated by boundariers defined by voxel
-        rand_coords[:,0] += step_x
-        rand_coords[:,1] += step_y
-        rand_coords[:,2] += step_z
-
-        coord_array[4*i,:] = rand_coords[0,:]
-        coord_array[4*i+1,:] = rand_coords[1,:]
-        coord_array[4*i+2,:] = rand_coords[2,:]
-        coord_array[4*i+3,:] = rand_coords[3,:]
+    #Generate 4 sets of random coordinates per tetrahedron
+    #then offset by the boundaries defined by each voxel
+    coord_array = np.random.random(size=(n,4,3)) + selected_vox[:,np.newaxis,:]
 
     return node_ids, coord_array.flatten()
 
@@ -166,7 +154,7 @@ def test_single_voxel_exclusion():
     '''
 
     #Make slab
-    data_grid = np.ones( (2,2,1), dtype=np.int)
+    data_grid = np.ones( (2,2,1), dtype=np.int64)
 
     #Set exclusion voxel (top right)
     data_grid[0,1,0] = 2
@@ -174,7 +162,7 @@ def test_single_voxel_exclusion():
     #Single tetrahedron
     tet_nodes = np.array([
         [0,1,2,3]
-        ], dtype=np.int)
+        ], dtype=np.int64)
 
     #Set node coordinates
     tet_coords = np.array([
@@ -329,8 +329,7 @@ class FieldFunc():
         normE = get_field_subset(sim_file, tet_ids)
         logger.info('Successfully pulled field values!')
 
-        neg_ind = np.where(normE < 0)
-        normE[neg_ind] = 0
+        np.maximum(normE, 0, out=normE)
 
         vols = self.cached_mesh.elements_volumes_and_areas().value[tet_ids]
 